@@ -8,10 +8,13 @@ Usage:
     app = create_app()
 """
 
+import orjson
 from flask import Flask
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 from app.config import Config
 from app.logger import logger
@@ -20,10 +23,20 @@ from app.logger import logger
 limiter = Limiter(
     key_func=get_remote_address,
     default_limits=[Config.RATE_LIMIT_DEFAULT],
-    storage_uri="memory://",          # swap for redis:// in production
+    storage_uri=Config.RATE_LIMIT_STORAGE_URI,  # redis:// for multi-worker production
 )
 
 
+class OrJSONProvider(JSONProvider):
+    """Serialise JSON responses with orjson (C extension) instead of stdlib json."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 def create_app() -> Flask:
     """Create and configure the Flask application."""
     app = Flask(
@@ -32,6 +45,14 @@ def create_app() -> Flask:
         static_folder="../static",
     )
     app.secret_key = Config.SECRET_KEY
+    app.json = OrJSONProvider(app)
+
+    # ── Reverse proxy: trust X-Forwarded-* from PROXY_COUNT hops ──────────────
+    # Without this, every client behind nginx shares one IP for rate limits
+    # and the user@IP chat-session fallback.
+    if Config.PROXY_COUNT:
+        n = Config.PROXY_COUNT
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=n, x_proto=n, x_host=n)
 
     # ── CORS (restrict origins in production) ──────────────────────────────────
     CORS(app, resources={r"/api/*": {"origins": "*"}})
@@ -40,14 +61,15 @@ def create_app() -> Flask:
     limiter.init_app(app)
 
     # ── Register blueprints ────────────────────────────────────────────────────
-    from app.routes import main_bp, api_bp
+    from app.routes import main_bp, api_bp, cache_index_page
     app.register_blueprint(main_bp)
     app.register_blueprint(api_bp, url_prefix="/api")
+    cache_index_page(app)
 
-    # ── Pre-warm the RAG chain on startup ─────────────────────────────────────
+    # ── Pre-load the vector store on startup (LLM client is built lazily) ─────
     try:
-        from app.rag import get_rag_chain
-        get_rag_chain()
+        from app.rag import get_retriever
+        get_retriever()
     except FileNotFoundError as exc:
         logger.warning("Vector store not found at startup — %s", exc)
 
@@ -16,6 +16,20 @@
 /* ── State ──────────────────────────────────────────────────────────────────── */
 let credentials = null;   // { username, password } set after auth modal
 
+// Per-tab conversation id so the server keeps this tab's chat history apart
+// from other users behind the same IP / proxy.
+const sessionId = (() => {
+  let id = sessionStorage.getItem("medassistSessionId");
+  if (!id) {
+    id = crypto.randomUUID
+      ? crypto.randomUUID()
+      : Array.from(crypto.getRandomValues(new Uint8Array(16)),
+                   (b) => b.toString(16).padStart(2, "0")).join("");
+    sessionStorage.setItem("medassistSessionId", id);
+  }
+  return id;
+})();
+
 /* ── DOM refs ───────────────────────────────────────────────────────────────── */
 const authModal   = document.getElementById("authModal");
 const authForm    = document.getElementById("authForm");
@@ -87,6 +101,7 @@ function buildHeaders(creds) {
   return {
     "Content-Type": "application/json",
     "Authorization": `Basic ${b64}`,
+    "X-Session-Id": sessionId,
   };
 }
 
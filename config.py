@@ -23,6 +23,14 @@ class Config:
 
     # ── Vector Store ─────────────────────────────────────────────────────────────
     VECTOR_STORE_PATH: str = os.getenv("VECTOR_STORE_PATH", "data/vector_store")
+    # Vector encoding: "SQfp16" (2 bytes/dim) | "SQ8" (1 byte/dim)
+    #                  | "PQ32x8" (32 bytes/vec) | "Flat" (float32)
+    QUANTIZER: str = os.getenv("QUANTIZER", "SQfp16")
+    # faiss.index_factory string; IVF/quantisation trade a little recall for RAM + speed.
+    # IVF is only used once there are >= 39 vectors per list (~40k for IVF1024);
+    # smaller libraries get the bare QUANTIZER index with exact search.
+    VECTOR_INDEX_FACTORY: str = os.getenv("VECTOR_INDEX_FACTORY", f"IVF1024,{QUANTIZER}")
+    VECTOR_INDEX_NPROBE: int = int(os.getenv("VECTOR_INDEX_NPROBE", 16))
 
     # ── Pinecone (optional) ───────────────────────────────────────────────────────
     PINECONE_API_KEY: str = os.getenv("PINECONE_API_KEY", "")
@@ -34,19 +42,32 @@ class Config:
     SECRET_KEY: str = os.environ["FLASK_SECRET_KEY"]
     FLASK_ENV: str = os.getenv("FLASK_ENV", "production")
     PORT: int = int(os.getenv("FLASK_PORT", 5000))
+    # Number of reverse proxies (e.g. nginx) in front of the app; 0 = none
+    PROXY_COUNT: int = int(os.getenv("PROXY_COUNT", 0))
 
     # ── Basic Auth ────────────────────────────────────────────────────────────────
     API_USERNAME: str = os.environ["API_USERNAME"]
     API_PASSWORD: str = os.environ["API_PASSWORD"]
+    # Seconds a successful login is remembered before the hash is re-checked
+    AUTH_CACHE_TTL: int = int(os.getenv("AUTH_CACHE_TTL", 120))
 
     # ── Rate Limiting ─────────────────────────────────────────────────────────────
     RATE_LIMIT_DEFAULT: str = os.getenv("RATE_LIMIT_DEFAULT", "30 per minute")
     RATE_LIMIT_CHAT: str = os.getenv("RATE_LIMIT_CHAT", "10 per minute")
+    # memory:// keeps limits per process; use redis://… to share across workers
+    RATE_LIMIT_STORAGE_URI: str = os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")
 
     # ── RAG ───────────────────────────────────────────────────────────────────────
     CHUNK_SIZE: int = int(os.getenv("CHUNK_SIZE", 800))
     CHUNK_OVERLAP: int = int(os.getenv("CHUNK_OVERLAP", 100))
     RETRIEVER_TOP_K: int = int(os.getenv("RETRIEVER_TOP_K", 4))
+    # Coalesce concurrent queries into one embeddings call + one FAISS search
+    BATCH_RETRIEVAL: bool = os.getenv("BATCH_RETRIEVAL", "false").lower() in ("1", "true", "yes")
+    RETRIEVAL_MAX_BATCH: int = int(os.getenv("RETRIEVAL_MAX_BATCH", 16))
+    RETRIEVAL_MAX_WAIT_MS: int = int(os.getenv("RETRIEVAL_MAX_WAIT_MS", 10))
+    ANSWER_CACHE_SIZE: int = int(os.getenv("ANSWER_CACHE_SIZE", 512))  # 0 disables
+    EMBED_BATCH_SIZE: int = int(os.getenv("EMBED_BATCH_SIZE", 256))
+    EMBED_CONCURRENCY: int = int(os.getenv("EMBED_CONCURRENCY", 8))
 
     # ── Logging ───────────────────────────────────────────────────────────────────
     LOG_DIR: str = "logs"
@@ -5,7 +5,7 @@ scripts/ingest.py
 One-time (or on-demand) script to:
   1. Load all PDF files from data/pdfs/
   2. Split them into overlapping text chunks
-  3. Embed each chunk with OpenAI embeddings
+  3. Embed the chunks with OpenAI embeddings (batched, concurrent requests)
   4. Save a FAISS vector store to data/vector_store/
 
 Run this before starting the Flask app.
@@ -16,25 +16,41 @@ Usage:
 """
 
 import argparse
+import asyncio
 import os
+import re
 import sys
 import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
+import faiss
+import numpy as np
 from tqdm import tqdm
 
 # ── Allow importing from project root ──────────────────────────────────────────
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
 from langchain_openai import OpenAIEmbeddings
 
 from app.config import Config
 from app.logger import logger
 
 
-def load_pdfs(pdf_dir: str) -> list:
+def _load_one(pdf_path: str) -> tuple:
+    """Parse a single PDF; runs in a worker process, so errors are returned."""
+    try:
+        return pdf_path, PyPDFLoader(pdf_path).load()
+    except Exception as exc:
+        return pdf_path, exc
+
+
+def load_pdfs(pdf_dir: str, workers: int | None = None) -> list:
     """Recursively load all PDF files from a directory."""
     pdf_files = []
     for root, _, files in os.walk(pdf_dir):
@@ -42,43 +58,156 @@ def load_pdfs(pdf_dir: str) -> list:
             if fname.lower().endswith(".pdf"):
                 pdf_files.append(os.path.join(root, fname))
 
+    # os.walk order depends on the filesystem; sort for reproducible builds
+    pdf_files.sort()
+
     if not pdf_files:
         logger.error("No PDF files found in '%s'.", pdf_dir)
         sys.exit(1)
 
     logger.info("Found %d PDF file(s).", len(pdf_files))
 
+    # PDF parsing is CPU-bound pure Python, so fan out across processes.
+    # A handful of files isn't worth the pool start-up cost.
+    if len(pdf_files) < 4:
+        results = (_load_one(p) for p in pdf_files)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count())
+        # map() yields in input order, so chunk ids are stable across runs
+        results = pool.map(_load_one, pdf_files)
+
     all_docs = []
-    for pdf_path in tqdm(pdf_files, desc="Loading PDFs"):
-        try:
-            loader = PyPDFLoader(pdf_path)
-            docs = loader.load()
+    loaded = 0
+    try:
+        for pdf_path, docs in tqdm(results, total=len(pdf_files), desc="Loading PDFs"):
+            if isinstance(docs, Exception):
+                logger.warning("  Skipping '%s' — %s", pdf_path, docs)
+                continue
             # Attach filename as metadata for source attribution
             for doc in docs:
                 doc.metadata["source"] = os.path.basename(pdf_path)
             all_docs.extend(docs)
-            logger.info("  Loaded %d pages from '%s'.", len(docs), pdf_path)
-        except Exception as exc:
-            logger.warning("  Skipping '%s' — %s", pdf_path, exc)
+            loaded += 1
+            logger.debug("  Loaded %d pages from '%s'.", len(docs), pdf_path)
+    finally:
+        if pool is not None:
+            pool.shutdown()
 
+    logger.info("Loaded %d pages from %d PDF(s).", len(all_docs), loaded)
     return all_docs
 
 
-def split_documents(docs: list, chunk_size: int, chunk_overlap: int) -> list:
-    """Split raw document pages into smaller, overlapping chunks."""
+def _split_shard(docs: list, chunk_size: int, chunk_overlap: int) -> list:
+    """Split one shard of pages; each worker builds its own splitter."""
     splitter = RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
         # Prefer splitting on paragraph → sentence → word boundaries
         separators=["\n\n", "\n", ". ", " ", ""],
     )
-    chunks = splitter.split_documents(docs)
+    return splitter.split_documents(docs)
+
+
+def split_documents(
+    docs: list, chunk_size: int, chunk_overlap: int, workers: int | None = None
+) -> list:
+    """Split raw document pages into smaller, overlapping chunks."""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(docs) < workers:
+        chunks = _split_shard(docs, chunk_size, chunk_overlap)
+    else:
+        # Contiguous shards so the concatenated output keeps page order
+        step = -(-len(docs) // workers)
+        shards = [docs[i:i + step] for i in range(0, len(docs), step)]
+        split = partial(_split_shard, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = [c for shard in pool.map(split, shards) for c in shard]
     logger.info("Split %d pages → %d chunks.", len(docs), len(chunks))
     return chunks
 
 
-def build_vector_store(chunks: list, output_path: str) -> None:
-    """Embed chunks and save FAISS index to disk."""
+# faiss warns below 39 training points per k-means centroid
+_MIN_POINTS_PER_IVF_LIST = 39
+
+
+def _build_index(vecs: list, factory: str) -> faiss.Index:
+    """Train and fill a FAISS index described by an index_factory string."""
+    # One contiguous (N, dim) block, unit-normalised so inner product is cosine
+    matrix = np.ascontiguousarray(vecs, dtype=np.float32)
+    faiss.normalize_L2(matrix)
+    dim = matrix.shape[1]
+    # IVF needs ~39 training vectors per list to cluster well (and recall
+    # suffers below that), PQ needs at least one per centroid. Libraries too
+    # small for the configured index fall back to the bare quantizer, then
+    # to exact search.
+    candidates = list(dict.fromkeys([factory, Config.QUANTIZER, "Flat"]))
+    for spec in candidates:
+        ivf = re.search(r"IVF(\d+)", spec)
+        if ivf and len(matrix) < _MIN_POINTS_PER_IVF_LIST * int(ivf.group(1)):
+            logger.info("Only %d vectors — too few for '%s', skipping it.",
+                        len(matrix), spec)
+            continue
+        index = faiss.index_factory(dim, spec, faiss.METRIC_INNER_PRODUCT)
+        try:
+            index.train(matrix)
+            break
+        except RuntimeError as exc:
+            logger.warning("Cannot train '%s' on %d vectors (%s).",
+                           spec, len(matrix), exc)
+    index.add(matrix)
+    return index
+
+
+async def _embed_all(
+    embeddings: OpenAIEmbeddings, batches: list, concurrency: int
+) -> list:
+    """Embed batches with up to *concurrency* requests in flight, keeping order."""
+    semaphore = asyncio.Semaphore(concurrency)
+    progress = tqdm(total=len(batches), desc="Embedding batches")
+
+    async def _one(batch: list) -> list:
+        async with semaphore:
+            vecs = await embeddings.aembed_documents(batch)
+        progress.update()
+        return vecs
+
+    try:
+        # gather() returns results in submission order, not completion order
+        results = await asyncio.gather(*[_one(b) for b in batches])
+    finally:
+        progress.close()
+    return [vec for vecs in results for vec in vecs]
+
+
+def _write_arrow_docstore(chunks: list, path: str) -> None:
+    """
+    Write chunk texts + metadata as an Arrow file the app can memory-map,
+    so gunicorn workers share one copy instead of each unpickling it.
+    Row i holds the chunk with docstore id str(i).
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        logger.warning("pyarrow is not installed — skipping '%s'.", path)
+        if os.path.exists(path):
+            os.remove(path)  # a stale file would no longer match the index
+        return
+
+    table = pa.table({
+        "text": pa.array([c.page_content for c in chunks], pa.large_string()),
+        "source": pa.array([c.metadata.get("source") for c in chunks], pa.string()),
+        "page": pa.array([c.metadata.get("page") for c in chunks], pa.int64()),
+    })
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def build_vector_store(
+    chunks: list, output_path: str, batch_size: int = Config.EMBED_BATCH_SIZE
+) -> None:
+    """Embed chunks in batches and save FAISS index to disk."""
     logger.info("Building embeddings (model=%s) …", Config.OPENAI_EMBEDDING_MODEL)
 
     embeddings = OpenAIEmbeddings(
@@ -86,13 +215,32 @@ def build_vector_store(chunks: list, output_path: str) -> None:
         openai_api_key=Config.OPENAI_API_KEY,
     )
 
+    texts = [c.page_content for c in chunks]
+
     t0 = time.perf_counter()
-    vector_store = FAISS.from_documents(chunks, embeddings)
+    # One embeddings request per batch, several batches in flight at once
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    all_vecs = asyncio.run(
+        _embed_all(embeddings, batches, Config.EMBED_CONCURRENCY)
+    )
     elapsed = round(time.perf_counter() - t0, 1)
     logger.info("Embedded %d chunks in %.1fs.", len(chunks), elapsed)
 
+    index = _build_index(all_vecs, Config.VECTOR_INDEX_FACTORY)
+    ids = [str(i) for i in range(len(chunks))]
+    vector_store = FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=InMemoryDocstore(dict(zip(ids, chunks))),
+        index_to_docstore_id=dict(enumerate(ids)),
+        distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT,
+    )
+    logger.info("Built FAISS index (%s, %d vectors).",
+                type(index).__name__, index.ntotal)
+
     os.makedirs(output_path, exist_ok=True)
     vector_store.save_local(output_path)
+    _write_arrow_docstore(chunks, os.path.join(output_path, "docs.arrow"))
     logger.info("FAISS index saved to '%s'.", output_path)
 
 
@@ -120,12 +268,24 @@ def main():
         default=Config.CHUNK_OVERLAP,
         help=f"Overlap between chunks (default: {Config.CHUNK_OVERLAP})",
     )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=Config.EMBED_BATCH_SIZE,
+        help=f"Chunks per embeddings request (default: {Config.EMBED_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for PDF loading and splitting (default: CPU count)",
+    )
     args = parser.parse_args()
 
     logger.info("=== Medical Chatbot — PDF Ingestion ===")
-    docs = load_pdfs(args.pdf_dir)
-    chunks = split_documents(docs, args.chunk_size, args.chunk_overlap)
-    build_vector_store(chunks, args.out)
+    docs = load_pdfs(args.pdf_dir, args.workers)
+    chunks = split_documents(docs, args.chunk_size, args.chunk_overlap, args.workers)
+    build_vector_store(chunks, args.out, args.batch_size)
     logger.info("=== Ingestion complete. You can now start the Flask app. ===")
 
 
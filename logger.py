@@ -29,8 +29,10 @@ def setup_logger(name: str = "medical_chatbot") -> logging.Logger:
     )
 
     # ── Rotating file handler (5 MB × 3 backups) ────────────────────────────────
+    # delay=True: the file is not opened until the first record is written
     fh = RotatingFileHandler(
-        Config.LOG_FILE, maxBytes=5 * 1024 * 1024, backupCount=3, encoding="utf-8"
+        Config.LOG_FILE, maxBytes=5 * 1024 * 1024, backupCount=3,
+        encoding="utf-8", delay=True,
     )
     fh.setFormatter(fmt)
 
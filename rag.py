@@ -10,13 +10,28 @@ Flow:
 Supports both FAISS (local) and Pinecone (cloud).
 """
 
+import hashlib
 import os
+import pickle
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from contextlib import closing
 from functools import lru_cache
+from typing import Any
 
+import faiss
+import numpy as np
 from langchain.chains import ConversationalRetrievalChain
-from langchain.memory import ConversationBufferWindowMemory
 from langchain.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
+from langchain_community.docstore.base import Docstore
 from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 
 from app.config import Config
@@ -56,6 +71,51 @@ def _build_prompt() -> ChatPromptTemplate:
     )
 
 
+class MmapDocstore(Docstore):
+    """
+    Read-only docstore over a memory-mapped Arrow file written by ingest.py.
+
+    Chunk texts stay in the page cache and are shared by every gunicorn
+    worker; a Document is only materialised for the rows a query returns.
+    """
+
+    def __init__(self, table) -> None:
+        self._text = table.column("text")
+        self._source = table.column("source")
+        self._page = table.column("page")
+        self._rows = table.num_rows
+
+    def search(self, search: str) -> str | Document:
+        try:
+            row = int(search)
+        except ValueError:
+            row = -1
+        if not 0 <= row < self._rows:
+            return f"ID {search} not found."
+        metadata = {"source": self._source[row].as_py(), "page": self._page[row].as_py()}
+        return Document(
+            page_content=self._text[row].as_py(),
+            metadata={k: v for k, v in metadata.items() if v is not None},
+        )
+
+
+def _open_arrow_docstore(path: str, expected_rows: int) -> MmapDocstore | None:
+    """Open docs.arrow if present and usable; None means use the pickle."""
+    if not os.path.exists(path):
+        return None
+    try:
+        import pyarrow as pa
+    except ImportError:
+        logger.warning("pyarrow is not installed — loading the pickled docstore.")
+        return None
+    table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    if table.num_rows != expected_rows:
+        logger.warning("'%s' has %d rows but the index has %d — ignoring it.",
+                       path, table.num_rows, expected_rows)
+        return None
+    return MmapDocstore(table)
+
+
 def _load_faiss_store(embeddings: OpenAIEmbeddings) -> FAISS:
     """Load a pre-built FAISS index from disk."""
     path = Config.VECTOR_STORE_PATH
@@ -65,7 +125,41 @@ def _load_faiss_store(embeddings: OpenAIEmbeddings) -> FAISS:
             "Run `python scripts/ingest.py` first to build it."
         )
     logger.info("Loading FAISS vector store from '%s'", path)
-    return FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True)
+
+    # Read the raw index directly so quantised codes (SQ8 / PQ) stay compact.
+    # IO_FLAG_MMAP only maps the inverted lists of IVF indexes (faiss 1.8):
+    # those are paged in on demand and shared via the page cache. Flat and
+    # SQ codes are still read onto each worker's heap.
+    index = faiss.read_index(
+        os.path.join(path, "index.faiss"),
+        faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY,
+    )
+    docstore = _open_arrow_docstore(os.path.join(path, "docs.arrow"), index.ntotal)
+    if docstore is not None:
+        # ingest.py numbers chunks in index order, so row i has id str(i)
+        index_to_docstore_id = {i: str(i) for i in range(index.ntotal)}
+    else:
+        with open(os.path.join(path, "index.pkl"), "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+
+    try:
+        faiss.extract_index_ivf(index).nprobe = Config.VECTOR_INDEX_NPROBE
+    except RuntimeError:
+        pass  # not an IVF index — nothing to tune
+
+    # Indexes built by scripts/ingest.py use inner product; older ones are L2
+    if index.metric_type == faiss.METRIC_INNER_PRODUCT:
+        distance_strategy = DistanceStrategy.MAX_INNER_PRODUCT
+    else:
+        distance_strategy = DistanceStrategy.EUCLIDEAN_DISTANCE
+
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=index_to_docstore_id,
+        distance_strategy=distance_strategy,
+    )
 
 
 def _load_pinecone_store(embeddings: OpenAIEmbeddings):
@@ -84,14 +178,83 @@ def _load_pinecone_store(embeddings: OpenAIEmbeddings):
         ) from exc
 
 
+# ── Batched retrieval ─────────────────────────────────────────────────────────
+# Concurrent chat requests each need one query embedding and one FAISS search.
+# With BATCH_RETRIEVAL on, a background thread collects queries for a few ms,
+# embeds them in a single API call and searches the index once for all.
+class _RetrievalBatcher:
+    def __init__(self, store: FAISS) -> None:
+        self._store = store
+        self._queue: "queue.Queue[tuple[str, Future]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._owner_pid = None
+
+    def submit(self, query: str) -> list:
+        """Queue *query* and block until its documents are ready."""
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((query, future))
+        return future.result()
+
+    def _ensure_worker(self) -> None:
+        # Threads do not survive fork, so each gunicorn worker starts its own
+        with self._lock:
+            if self._owner_pid != os.getpid():
+                threading.Thread(target=self._run, name="retrieval-batcher",
+                                 daemon=True).start()
+                self._owner_pid = os.getpid()
+
+    def _run(self) -> None:
+        max_wait = Config.RETRIEVAL_MAX_WAIT_MS / 1000
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + max_wait
+            while len(batch) < Config.RETRIEVAL_MAX_BATCH:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            try:
+                results = self._search([query for query, _ in batch])
+            except Exception as exc:
+                for _, future in batch:
+                    future.set_exception(exc)
+            else:
+                for (_, future), docs in zip(batch, results):
+                    future.set_result(docs)
+
+    def _search(self, queries: list) -> list:
+        store = self._store
+        vecs = store.embedding_function.embed_documents(queries)
+        _, rows = store.index.search(
+            np.asarray(vecs, dtype=np.float32), Config.RETRIEVER_TOP_K
+        )
+        return [
+            [store.docstore.search(store.index_to_docstore_id[i]) for i in hits if i != -1]
+            for hits in rows
+        ]
+
+
+class BatchingRetriever(BaseRetriever):
+    """Retriever that hands queries to a _RetrievalBatcher."""
+
+    batcher: Any
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list:
+        return self.batcher.submit(query)
+
+
 @lru_cache(maxsize=1)
-def get_rag_chain() -> ConversationalRetrievalChain:
+def get_retriever() -> BaseRetriever:
     """
-    Build and cache the RAG chain.
-    Called once at app startup; subsequent calls return the cached instance.
+    Load the vector store and cache a retriever over it.
+    Called at app startup so the index is loaded before the first request.
     """
-    logger.info("Initialising RAG chain (model=%s)", Config.OPENAI_MODEL)
-
     embeddings = OpenAIEmbeddings(
         model=Config.OPENAI_EMBEDDING_MODEL,
         openai_api_key=Config.OPENAI_API_KEY,
@@ -103,12 +266,21 @@ def get_rag_chain() -> ConversationalRetrievalChain:
     else:
         vector_store = _load_faiss_store(embeddings)
 
-    retriever = vector_store.as_retriever(
+    if Config.BATCH_RETRIEVAL and isinstance(vector_store, FAISS):
+        logger.info("Batched retrieval enabled (max_batch=%d, max_wait=%d ms)",
+                    Config.RETRIEVAL_MAX_BATCH, Config.RETRIEVAL_MAX_WAIT_MS)
+        return BatchingRetriever(batcher=_RetrievalBatcher(vector_store))
+
+    return vector_store.as_retriever(
         search_type="similarity",
         search_kwargs={"k": Config.RETRIEVER_TOP_K},
     )
 
-    llm = ChatOpenAI(
+
+@lru_cache(maxsize=1)
+def _get_llm() -> ChatOpenAI:
+    """Create the chat model client once, on first use."""
+    return ChatOpenAI(
         model=Config.OPENAI_MODEL,
         temperature=0.2,          # low temperature → more factual
         openai_api_key=Config.OPENAI_API_KEY,
@@ -116,18 +288,21 @@ def get_rag_chain() -> ConversationalRetrievalChain:
         max_retries=2,
     )
 
-    # Keep a rolling window of the last 6 exchanges for multi-turn context
-    memory = ConversationBufferWindowMemory(
-        k=6,
-        memory_key="chat_history",
-        return_messages=True,
-        output_key="answer",
-    )
 
+@lru_cache(maxsize=1)
+def get_chain() -> ConversationalRetrievalChain:
+    """
+    Build and cache the RAG chain.
+    Built lazily on the first chat request so the LLM client is not created
+    at boot; subsequent calls return the cached instance.
+    """
+    logger.info("Initialising RAG chain (model=%s)", Config.OPENAI_MODEL)
+
+    # No memory on the chain: history is kept per session (see below) and
+    # passed in with each call, so the chain itself is stateless.
     chain = ConversationalRetrievalChain.from_llm(
-        llm=llm,
-        retriever=retriever,
-        memory=memory,
+        llm=_get_llm(),
+        retriever=get_retriever(),
         combine_docs_chain_kwargs={"prompt": _build_prompt()},
         return_source_documents=True,
         verbose=False,
@@ -137,30 +312,187 @@ def get_rag_chain() -> ConversationalRetrievalChain:
     return chain
 
 
-def query_rag(question: str) -> dict:
+# ── Per-session chat history ──────────────────────────────────────────────────
+# session id → last few (question, answer) pairs. The chain formats tuples
+# with a plain string join when condensing follow-up questions.
+_HISTORY_TURNS = 6
+_MAX_SESSIONS = 1024
+_histories: "OrderedDict[str, deque]" = OrderedDict()
+_histories_lock = threading.Lock()
+
+
+def _get_history(session_id: str) -> list:
+    """Return a snapshot of the session's recent turns (oldest first)."""
+    with _histories_lock:
+        turns = _histories.get(session_id)
+        if turns is None:
+            return []
+        _histories.move_to_end(session_id)
+        return list(turns)
+
+
+def _append_history(session_id: str, question: str, answer: str) -> None:
+    with _histories_lock:
+        turns = _histories.get(session_id)
+        if turns is None:
+            turns = _histories[session_id] = deque(maxlen=_HISTORY_TURNS)
+            if len(_histories) > _MAX_SESSIONS:
+                _histories.popitem(last=False)
+        else:
+            _histories.move_to_end(session_id)
+        turns.append((question, answer))
+
+
+# ── Answer cache ──────────────────────────────────────────────────────────────
+# (question, chat history) → (answer, sources). Repeated questions skip both
+# the embedding call and the LLM call. History is part of the key because the
+# chain condenses follow-up questions against it.
+_answer_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_answer_cache_lock = threading.Lock()
+
+
+def _answer_cache_key(question: str, history: list) -> str:
+    h = hashlib.sha1(question.lower().encode("utf-8"))
+    for human, ai in history:
+        h.update(b"\x00" + human.encode("utf-8") + b"\x00" + ai.encode("utf-8"))
+    return h.hexdigest()
+
+
+def _answer_cache_enabled() -> bool:
+    return Config.ANSWER_CACHE_SIZE > 0 and Config.FLASK_ENV != "development"
+
+
+def _answer_cache_get(key: str) -> tuple | None:
+    with _answer_cache_lock:
+        cached = _answer_cache.get(key)
+        if cached is not None:
+            _answer_cache.move_to_end(key)
+    return cached
+
+
+def _answer_cache_put(key: str, answer: str, sources: list) -> None:
+    with _answer_cache_lock:
+        _answer_cache[key] = (answer, tuple(sources))
+        if len(_answer_cache) > Config.ANSWER_CACHE_SIZE:
+            _answer_cache.popitem(last=False)
+
+
+def _format_sources(docs: list) -> list:
+    return [
+        {
+            "source": doc.metadata.get("source", "unknown"),
+            "page": doc.metadata.get("page", "—"),
+        }
+        for doc in docs
+    ]
+
+
+def _lookup_answer(question: str, session_id: str, history: list) -> tuple:
+    """
+    Check the answer cache for this question and history.
+
+    Returns (cache key or None when caching is off, cached result or None).
+    A hit is recorded in the session history so the conversation window
+    stays in step with what the user saw.
+    """
+    if not _answer_cache_enabled():
+        return None, None
+    key = _answer_cache_key(question, history)
+    cached = _answer_cache_get(key)
+    if cached is None:
+        return key, None
+    answer, sources = cached
+    _append_history(session_id, question, answer)
+    logger.info("Answer cache hit.")
+    return key, {"answer": answer, "sources": list(sources)}
+
+
+def _remember_answer(
+    key: str | None, session_id: str, question: str, answer: str, sources: list
+) -> None:
+    """Record a freshly generated answer in the session history and cache."""
+    _append_history(session_id, question, answer)
+    if key is not None:
+        _answer_cache_put(key, answer, sources)
+
+
+def query_rag(question: str, session_id: str = "default") -> dict:
     """
     Run a user question through the RAG chain.
 
+    `session_id` selects the conversation whose recent turns are used to
+    interpret follow-up questions.
+
     Returns a dict with:
         answer        (str)  — LLM answer
         sources       (list) — list of source document metadata dicts
     """
-    chain = get_rag_chain()
+    chain = get_chain()
+    history = _get_history(session_id)
+
+    key, cached = _lookup_answer(question, session_id, history)
+    if cached is not None:
+        return cached
+
     try:
-        result = chain.invoke({"question": question})
+        result = chain.invoke({"question": question, "chat_history": history})
     except Exception as exc:
         logger.error("RAG chain error: %s", exc, exc_info=True)
         raise
 
-    sources = [
-        {
-            "source": doc.metadata.get("source", "unknown"),
-            "page": doc.metadata.get("page", "—"),
-        }
-        for doc in result.get("source_documents", [])
-    ]
+    sources = _format_sources(result.get("source_documents", []))
+    _remember_answer(key, session_id, question, result["answer"], sources)
 
     return {
         "answer": result["answer"],
         "sources": sources,
     }
+
+
+def stream_rag(question: str, session_id: str = "default"):
+    """
+    Like query_rag, but yield the answer as the LLM produces it.
+
+    Yields {"token": str} packets, then one final {"sources": list} packet.
+    Runs the same steps as the chain (condense → retrieve → answer) by hand
+    so that only the last step needs to stream.
+    """
+    chain = get_chain()
+    history = _get_history(session_id)
+
+    key, cached = _lookup_answer(question, session_id, history)
+    if cached is not None:
+        yield {"token": cached["answer"]}
+        yield {"sources": cached["sources"]}
+        return
+
+    try:
+        standalone = question
+        if history:
+            # Same "Human: …\nAssistant: …" transcript the chain builds
+            transcript = "".join(f"\nHuman: {q}\nAssistant: {a}" for q, a in history)
+            standalone = chain.question_generator.invoke(
+                {"question": question, "chat_history": transcript}
+            )["text"]
+
+        docs = get_retriever().invoke(standalone)
+        context = "\n\n".join(doc.page_content for doc in docs)
+
+        parts = []
+        # closing(): if our consumer stops early, tear down the LLM stream too
+        with closing((_build_prompt() | _get_llm()).stream(
+            {"context": context, "question": standalone}
+        )) as chunks:
+            for chunk in chunks:
+                if chunk.content:
+                    parts.append(chunk.content)
+                    yield {"token": chunk.content}
+    except Exception as exc:
+        logger.error("RAG stream error: %s", exc, exc_info=True)
+        raise
+
+    answer = "".join(parts)
+    sources = _format_sources(docs)
+    _remember_answer(key, session_id, question, answer, sources)
+
+    yield {"sources": sources}
@@ -3,23 +3,40 @@ app/routes.py
 ─────────────
 Two blueprints:
   main_bp  — serves the HTML frontend
-  api_bp   — JSON API endpoints (protected by HTTP Basic Auth + rate limiting)
+  api_bp   — JSON / SSE API endpoints (protected by HTTP Basic Auth + rate limiting)
 """
 
+import hashlib
+import hmac
+import re
+import threading
 import time
-from flask import Blueprint, jsonify, render_template, request
+from collections import OrderedDict
+from functools import wraps
+
+import orjson
+from flask import (
+    Blueprint,
+    Flask,
+    Response,
+    abort,
+    jsonify,
+    render_template,
+    request,
+    stream_with_context,
+)
 from flask_httpauth import HTTPBasicAuth
+from limits import parse_many
 from werkzeug.security import check_password_hash, generate_password_hash
 
 from app import limiter
 from app.config import Config
 from app.logger import logger
-from app.rag import query_rag
+from app.rag import query_rag, stream_rag
 from app.security import (
     CRISIS_RESPONSE,
     DISCLAIMER,
-    check_dangerous_content,
-    check_prompt_injection,
+    classify,
     sanitize_input,
 )
 
@@ -36,25 +53,124 @@ _USERS = {
 }
 
 
+# Recently verified credentials → time of verification. Lets a burst of
+# requests from one client skip the (deliberately slow) password KDF.
+# Only successes are cached, so failed attempts always pay the full cost.
+_AUTH_CACHE_SIZE = 256
+_auth_cache: "OrderedDict[bytes, float]" = OrderedDict()
+_auth_cache_lock = threading.Lock()
+
+
+def _auth_cache_key(username: str, password: str) -> bytes:
+    return hmac.new(
+        Config.SECRET_KEY.encode(), f"{username}:{password}".encode(), hashlib.sha256
+    ).digest()
+
+
 @auth.verify_password
 def verify_password(username: str, password: str) -> str | None:
     """Return username on success, None on failure."""
+    key = _auth_cache_key(username, password)
+    now = time.monotonic()
+    with _auth_cache_lock:
+        verified_at = _auth_cache.get(key)
+        if verified_at is not None and now - verified_at < Config.AUTH_CACHE_TTL:
+            _auth_cache.move_to_end(key)
+            return username
+
     hashed = _USERS.get(username)
     if hashed and check_password_hash(hashed, password):
+        with _auth_cache_lock:
+            _auth_cache[key] = now
+            _auth_cache.move_to_end(key)
+            if len(_auth_cache) > _AUTH_CACHE_SIZE:
+                _auth_cache.popitem(last=False)
         return username
     logger.warning("Failed auth attempt for user='%s' from IP=%s",
                    username, request.remote_addr)
     return None
 
 
+# ── In-process token bucket ───────────────────────────────────────────────────
+# Per-endpoint, per-IP [tokens, last_refill, per] for single-process
+# deployments. Avoids the limits-library storage round trip on the chat hot
+# path; with a shared backend (redis://) Flask-Limiter is used instead so
+# workers agree. Either way each chat endpoint has its own budget.
+_BUCKETS_MAX = 10_000
+# Least recently used first, so idle buckets sit at the front
+_buckets: "OrderedDict[tuple, list[float]]" = OrderedDict()
+_buckets_lock = threading.Lock()
+
+
+def token_bucket(rate: int, per: float):
+    """Allow *rate* requests per *per* seconds per endpoint and client IP."""
+    refill = rate / per
+
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            key = (request.endpoint, request.remote_addr or "unknown", rate, per)
+            now = time.monotonic()
+            with _buckets_lock:
+                bucket = _buckets.get(key)
+                if bucket is None:
+                    # Only drop buckets idle for a full period: they have
+                    # refilled, so forgetting them cannot reset a throttled
+                    # client. Active buckets are kept even past the cap.
+                    while len(_buckets) >= _BUCKETS_MAX:
+                        oldest = next(iter(_buckets.values()))
+                        if now - oldest[1] < oldest[2]:
+                            break
+                        _buckets.popitem(last=False)
+                    bucket = _buckets[key] = [float(rate), now, per]
+                else:
+                    _buckets.move_to_end(key)
+                tokens = min(rate, bucket[0] + (now - bucket[1]) * refill)
+                allowed = tokens >= 1
+                bucket[0] = tokens - 1 if allowed else tokens
+                bucket[1] = now
+            if not allowed:
+                abort(429)
+            return view(*args, **kwargs)
+        return wrapped
+    return decorator
+
+
+def chat_rate_limit(view):
+    """Apply RATE_LIMIT_CHAT via token buckets, or Flask-Limiter when shared."""
+    if not Config.RATE_LIMIT_STORAGE_URI.startswith("memory://"):
+        return limiter.limit(Config.RATE_LIMIT_CHAT)(view)
+    # One bucket per limit, e.g. "10/minute;100/hour" → two buckets
+    for item in parse_many(Config.RATE_LIMIT_CHAT):
+        view = token_bucket(item.amount, item.get_expiry())(view)
+    return limiter.exempt(view)
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Main blueprint — frontend
 # ─────────────────────────────────────────────────────────────────────────────
 
+# The chat UI is static, so it is rendered once at startup (see create_app)
+_index_html: bytes = b""
+_index_etag: str = ""
+
+
+def cache_index_page(app: Flask) -> None:
+    """Render index.html once and keep the bytes + ETag for every request."""
+    global _index_html, _index_etag
+    with app.test_request_context("/"):
+        _index_html = render_template("index.html").encode("utf-8")
+    _index_etag = hashlib.md5(_index_html).hexdigest()
+
+
 @main_bp.route("/")
 def index():
     """Serve the chat UI."""
-    return render_template("index.html")
+    response = Response(_index_html, mimetype="text/html")
+    response.set_etag(_index_etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = 300
+    return response.make_conditional(request)
 
 
 @main_bp.route("/health")
@@ -67,9 +183,84 @@ def health():
 # API blueprint — protected endpoints
 # ─────────────────────────────────────────────────────────────────────────────
 
+def _read_query() -> str:
+    """Return the raw "query" field of the JSON request body ("" if absent)."""
+    try:
+        data = orjson.loads(request.get_data() or b"{}")
+    except orjson.JSONDecodeError:
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+    return data.get("query", "").strip()
+
+
+_SESSION_ID_RE = re.compile(r"[A-Za-z0-9_-]{8,64}")
+
+
+def _session_id() -> str:
+    """
+    Conversation key for the chat history.
+
+    Clients send an X-Session-Id header (the bundled UI does, per browser
+    tab). Without one, fall back to user@IP — behind a reverse proxy that
+    needs PROXY_COUNT set so remote_addr is the real client address.
+    """
+    user = auth.current_user()
+    sid = request.headers.get("X-Session-Id", "")
+    if _SESSION_ID_RE.fullmatch(sid):
+        return f"{user}:{sid}"
+    return f"{user}@{request.remote_addr}"
+
+
+def _sse(packet: dict) -> bytes:
+    """Encode one Server-Sent Events message."""
+    return b"data: " + orjson.dumps(packet) + b"\n\n"
+
+
+def _screen_query(raw_query: str) -> tuple:
+    """
+    Sanitise and classify a query.
+
+    Returns (clean_query, verdict, error_response); error_response is a
+    ready 400 response when the query must be rejected, otherwise None.
+    """
+    try:
+        clean_query = sanitize_input(raw_query)
+    except ValueError as exc:
+        return None, None, (jsonify({"error": str(exc)}), 400)
+
+    verdict = classify(clean_query)
+    if verdict == "injection":
+        return clean_query, verdict, (jsonify({
+            "error": "Your message was flagged as a potential prompt-injection attempt "
+                     "and could not be processed."
+        }), 400)
+    return clean_query, verdict, None
+
+
+def _rag_error_response(exc: Exception):
+    """Map a RAG failure to the JSON error response the client sees."""
+    if isinstance(exc, FileNotFoundError):
+        logger.error("Vector store missing: %s", exc)
+        return jsonify({
+            "error": "The knowledge base is not yet initialised. "
+                     "Please contact the administrator."
+        }), 503
+    logger.error("Unexpected RAG error: %s", exc, exc_info=True)
+    return jsonify({
+        "error": "An internal error occurred. Please try again later."
+    }), 500
+
+
+def _crisis_packets():
+    """Stream packets for a refused dangerous request."""
+    yield {"token": CRISIS_RESPONSE}
+    yield {"sources": []}
+
+
 @api_bp.route("/chat", methods=["POST"])
 @auth.login_required
-@limiter.limit(Config.RATE_LIMIT_CHAT)
+@chat_rate_limit
 def chat():
     """
     POST /api/chat
@@ -79,26 +270,17 @@ def chat():
     start_time = time.perf_counter()
 
     # ── Parse request ──────────────────────────────────────────────────────────
-    data = request.get_json(silent=True) or {}
-    raw_query: str = data.get("query", "").strip()
+    raw_query = _read_query()
 
     logger.info("Chat request from user='%s' IP=%s query_len=%d",
                 auth.current_user(), request.remote_addr, len(raw_query))
 
-    # ── Input validation ───────────────────────────────────────────────────────
-    try:
-        clean_query = sanitize_input(raw_query)
-    except ValueError as exc:
-        return jsonify({"error": str(exc)}), 400
-
-    # ── Security checks ────────────────────────────────────────────────────────
-    if check_prompt_injection(clean_query):
-        return jsonify({
-            "error": "Your message was flagged as a potential prompt-injection attempt "
-                     "and could not be processed."
-        }), 400
+    # ── Input validation & security checks ─────────────────────────────────────
+    clean_query, verdict, error = _screen_query(raw_query)
+    if error is not None:
+        return error
 
-    if check_dangerous_content(clean_query):
+    if verdict == "dangerous":
         return jsonify({
             "answer": CRISIS_RESPONSE,
             "sources": [],
@@ -107,18 +289,9 @@ def chat():
 
     # ── RAG query ──────────────────────────────────────────────────────────────
     try:
-        result = query_rag(clean_query)
-    except FileNotFoundError as exc:
-        logger.error("Vector store missing: %s", exc)
-        return jsonify({
-            "error": "The knowledge base is not yet initialised. "
-                     "Please contact the administrator."
-        }), 503
+        result = query_rag(clean_query, session_id=_session_id())
     except Exception as exc:
-        logger.error("Unexpected RAG error: %s", exc, exc_info=True)
-        return jsonify({
-            "error": "An internal error occurred. Please try again later."
-        }), 500
+        return _rag_error_response(exc)
 
     elapsed = round((time.perf_counter() - start_time) * 1000)
     logger.info("Chat completed in %d ms for user='%s'", elapsed,
@@ -131,6 +304,67 @@ def chat():
     }), 200
 
 
+@api_bp.route("/chat/stream", methods=["POST"])
+@auth.login_required
+@chat_rate_limit
+def chat_stream():
+    """
+    POST /api/chat/stream
+    Body:  { "query": "What are symptoms of diabetes?" }
+    Returns: text/event-stream of JSON messages —
+             { "token": "..." } as the answer is generated, then
+             { "sources": [...], "response_time_ms": ... }.
+    Validation failures return the same JSON errors as /api/chat.
+    """
+    start_time = time.perf_counter()
+    user = auth.current_user()
+
+    raw_query = _read_query()
+    logger.info("Stream chat request from user='%s' IP=%s query_len=%d",
+                user, request.remote_addr, len(raw_query))
+
+    clean_query, verdict, error = _screen_query(raw_query)
+    if error is not None:
+        return error
+
+    if verdict == "dangerous":
+        packets = _crisis_packets()
+    else:
+        packets = stream_rag(clean_query, session_id=_session_id())
+
+    # Pull the first packet before committing to a 200 so set-up failures
+    # (missing vector store, API errors) still get a proper status code.
+    try:
+        first = next(packets)
+    except Exception as exc:
+        return _rag_error_response(exc)
+
+    def events():
+        try:
+            packet = first
+            while "sources" not in packet:
+                yield _sse(packet)
+                packet = next(packets)
+        except Exception as exc:
+            logger.error("Unexpected RAG stream error: %s", exc, exc_info=True)
+            yield _sse({"error": "An internal error occurred. Please try again later."})
+            return
+        finally:
+            # Also runs when the client disconnects and the response is closed
+            packets.close()
+
+        yield _sse({"token": DISCLAIMER})
+        elapsed = round((time.perf_counter() - start_time) * 1000)
+        logger.info("Stream chat completed in %d ms for user='%s'", elapsed, user)
+        yield _sse({"sources": packet["sources"], "response_time_ms": elapsed})
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ── Error handlers ─────────────────────────────────────────────────────────────
 
 @api_bp.errorhandler(429)
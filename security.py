@@ -5,15 +5,26 @@ Input sanitisation, prompt-injection detection, and medical safety guardrails.
 """
 
 import re
-from typing import Optional
+import threading
+from typing import Literal, Optional
 
 import bleach
 
 from app.logger import logger
 
+try:  # optional: Hyperscan compiles all guardrail patterns into one DFA
+    import hyperscan  # type: ignore
+except ImportError:
+    hyperscan = None
+
 # ── Max input length (tokens are ~4 chars each; 500 tokens ≈ 2000 chars) ─────────
 MAX_QUERY_LENGTH = 2000
 
+# ── Characters bleach rewrites in plain text ──────────────────────────────────
+# Markup (< > &) plus control characters: bleach drops NUL and turns the other
+# C0 controls into "?". Text with none of these comes out of bleach unchanged.
+_NEEDS_BLEACH_RE = re.compile(r"[<>&\x00-\x08\x0b\x0c\x0e-\x1f\x7f]")
+
 # ── Prompt-injection patterns ──────────────────────────────────────────────────
 _INJECTION_PATTERNS = [
     r"ignore\s+(all\s+)?previous\s+instructions",
@@ -40,11 +51,82 @@ _DANGEROUS_PATTERNS = [
     r"how\s+much\s+\w+\s+to\s+die",
     r"poison\s+someone",
 ]
-_DANGEROUS_RE = re.compile(
-    "|".join(_DANGEROUS_PATTERNS), re.IGNORECASE | re.DOTALL
+
+# ── Both categories fused into one pattern: a single regex pass per query ──────
+_ALL_RE = re.compile(
+    "(?P<inj>" + "|".join(_INJECTION_PATTERNS) + ")"
+    "|(?P<dang>" + "|".join(_DANGEROUS_PATTERNS) + ")",
+    re.IGNORECASE | re.DOTALL,
 )
 
 
+def _compile_hyperscan_db():
+    """Compile every guardrail pattern into one Hyperscan database, if available."""
+    if hyperscan is None:
+        return None
+    patterns = _INJECTION_PATTERNS + _DANGEROUS_PATTERNS
+    flags = (hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_DOTALL
+             | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP)
+    try:
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[p.encode() for p in patterns],
+            ids=list(range(len(patterns))),
+            flags=[flags] * len(patterns),
+        )
+    except hyperscan.error as exc:
+        logger.warning("Hyperscan compile failed, using re — %s", exc)
+        return None
+    return db
+
+
+_HS_DB = _compile_hyperscan_db()
+
+# A scratch space can only serve one scan at a time and hs_scan releases the
+# GIL, so each request thread gets its own.
+_hs_local = threading.local()
+
+
+def _hyperscan_matches(text: str) -> set:
+    """Return the ids of all guardrail patterns that match *text*."""
+    scratch = getattr(_hs_local, "scratch", None)
+    if scratch is None:
+        scratch = _hs_local.scratch = hyperscan.Scratch(_HS_DB)
+    matched = set()
+
+    def on_match(pattern_id, start, end, flags, context):
+        matched.add(pattern_id)
+
+    _HS_DB.scan(text.encode("utf-8", "replace"), match_event_handler=on_match,
+                scratch=scratch)
+    return matched
+
+
+def _classify_re(text: str) -> str:
+    m = _ALL_RE.search(text)
+    if m is None:
+        return "ok"
+    if m.lastgroup == "inj":
+        return "injection"
+    # Injection takes precedence over a dangerous request. An injection match
+    # starting at the same offset would have won the alternation, so only the
+    # rest of the text needs checking — and only on this rare path.
+    if _INJECTION_RE.search(text, m.start() + 1):
+        return "injection"
+    return "dangerous"
+
+
+def _classify_hyperscan(text: str) -> str:
+    try:
+        matched = _hyperscan_matches(text)
+    except hyperscan.error as exc:
+        logger.warning("Hyperscan scan failed, using re — %s", exc)
+        return _classify_re(text)
+    if any(i < len(_INJECTION_PATTERNS) for i in matched):
+        return "injection"
+    return "dangerous" if matched else "ok"
+
+
 def sanitize_input(text: str) -> Optional[str]:
     """
     Clean and validate user input.
@@ -55,34 +137,35 @@ def sanitize_input(text: str) -> Optional[str]:
     if not text or not text.strip():
         raise ValueError("Query cannot be empty.")
 
-    # Strip HTML tags / JavaScript via bleach
-    cleaned = bleach.clean(text, tags=[], strip=True).strip()
+    # Strip HTML tags / JavaScript via bleach. Text without markup or control
+    # characters comes out of bleach unchanged, so skip its html5lib parse.
+    if _NEEDS_BLEACH_RE.search(text):
+        cleaned = bleach.clean(text, tags=[], strip=True).strip()
+    else:
+        cleaned = text.strip()
 
     if len(cleaned) > MAX_QUERY_LENGTH:
         raise ValueError(
             f"Query is too long. Please limit to {MAX_QUERY_LENGTH} characters."
         )
 
-    # Normalise whitespace
-    cleaned = re.sub(r"\s+", " ", cleaned)
+    # Normalise whitespace (str.split/join is a single C pass, no regex)
+    return " ".join(cleaned.split())
 
-    return cleaned
 
+def classify(text: str) -> Literal["ok", "injection", "dangerous"]:
+    """
+    Run the guardrails over a query in one pass.
 
-def check_prompt_injection(text: str) -> bool:
-    """Return True if the text looks like a prompt-injection attempt."""
-    if _INJECTION_RE.search(text):
+    Returns "injection" for a prompt-injection attempt, "dangerous" for a
+    request for genuinely dangerous medical content, otherwise "ok".
+    """
+    verdict = _classify_re(text) if _HS_DB is None else _classify_hyperscan(text)
+    if verdict == "injection":
         logger.warning("Prompt-injection attempt detected: %.100s", text)
-        return True
-    return False
-
-
-def check_dangerous_content(text: str) -> bool:
-    """Return True if the query requests genuinely dangerous medical content."""
-    if _DANGEROUS_RE.search(text):
+    elif verdict == "dangerous":
         logger.warning("Dangerous content request detected: %.100s", text)
-        return True
-    return False
+    return verdict
 
 
 DISCLAIMER = (